@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+# Generous by default, since cold interpreter start on a loaded machine may be slow
+_IMPORT_TIME_LIMIT = float(os.environ.get('TORCHSTRUCT_IMPORT_TIME_LIMIT', '5.0'))
+
+_IMPORT_SCRIPT = '''
+import sys
+import time
+
+start = time.perf_counter()
+import torchstruct
+from torchstruct import keys, parse_shape, read_header
+elapsed = time.perf_counter() - start
+assert 'torch' not in sys.modules
+print(elapsed)
+'''
+
+
+def _run(script: str) -> str:
+    return subprocess.run([sys.executable, '-c', script], check=True, stdout=subprocess.PIPE,
+                          universal_newlines=True).stdout
+
+
+def test_import_should_not_import_torch():
+    elapsed = float(_run(_IMPORT_SCRIPT))
+    assert elapsed < _IMPORT_TIME_LIMIT
+
+
+def test_struct_access_should_import_torch():
+    _run('import sys, torchstruct; torchstruct.TensorStruct; assert "torch" in sys.modules')
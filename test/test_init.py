@@ -63,3 +63,61 @@ def test_struct_common_size_should_return_size_of_first_tensor_in_dict():
         }
     })
     assert t.common_size(0) in [10, 5]
+
+
+def test_struct_from_dict_should_validate_data_by_default():
+    with pytest.raises(AssertionError):
+        _ = TensorStruct.from_dict({'a': (1, 2)})
+
+
+def test_struct_from_dict_should_wrap_data_without_validation():
+    d = {'a': torch.ones(5), 'b': {'c': torch.zeros(2)}}
+    t = TensorStruct.from_dict(d, validate=False)
+    assert t.data() is d
+    assert t['b']['c'].shape == (2,)
+
+
+def test_struct_from_batch_should_stack_nested_dicts():
+    batch = [{
+        'a': torch.ones(2) * i,
+        'b': {
+            'c': torch.zeros((3, 4))
+        }
+    } for i in range(5)]
+    t = TensorStruct.from_batch(batch)
+    assert t['a'].shape == (5, 2)
+    assert t['b']['c'].shape == (5, 3, 4)
+    assert torch.all(t['a'][3].eq(torch.ones(2) * 3))
+
+
+def test_struct_from_batch_should_raise_on_extra_keys():
+    with pytest.raises(ValueError):
+        _ = TensorStruct.from_batch([{'a': torch.ones(2)}, {'a': torch.ones(2), 'b': torch.ones(2)}])
+
+
+def test_struct_from_batch_should_raise_on_missing_keys():
+    with pytest.raises(ValueError):
+        _ = TensorStruct.from_batch([{'a': torch.ones(2), 'b': {'c': torch.ones(2)}},
+                                     {'a': torch.ones(2), 'b': {'d': torch.ones(2)}}])
+
+
+def test_struct_from_batch_should_raise_on_mixed_leaves_and_dicts():
+    with pytest.raises(ValueError):
+        _ = TensorStruct.from_batch([{'r': torch.ones(2)}, {'r': {'x': torch.ones(2)}}])
+
+
+def test_struct_from_batch_should_convert_scalar_leaves():
+    t = TensorStruct.from_batch([{'r': 1.0, 'done': False}, {'r': 2.0, 'done': True}])
+    assert torch.all(t['r'].eq(torch.tensor([1.0, 2.0])))
+    assert t['done'].dtype == torch.bool
+
+
+def test_struct_from_batch_should_accept_structs():
+    batch = [TensorStruct.ones({'a': (2,)}) for _ in range(3)]
+    t = TensorStruct.from_batch(batch, dim=1)
+    assert t['a'].shape == (2, 3)
+
+
+def test_struct_from_batch_should_raise_on_empty_batch():
+    with pytest.raises(ValueError):
+        _ = TensorStruct.from_batch([])
@@ -0,0 +1,107 @@
+import pytest
+import torch
+
+from torchstruct import TensorStruct, TensorMemory
+
+
+def test_memory_should_return_footprint_of_each_tensor():
+    t = TensorStruct({
+        'a': torch.zeros((4, 2), dtype=torch.float32),
+        'b': {
+            'c': torch.zeros(3, dtype=torch.int64)
+        }
+    })
+    m = t.memory()
+    assert len(m) == 2
+    assert m[('a',)] == TensorMemory((4, 2), torch.float32, torch.device('cpu'), 32, 32, False)
+    assert m[('b', 'c')].logical_nbytes == 24
+    assert m[('b', 'c')].storage_nbytes == 24
+    assert m[('b', 'c')].dtype == torch.int64
+
+
+def test_nbytes_should_sum_all_tensors():
+    t = TensorStruct({
+        'a': torch.zeros((4, 2), dtype=torch.float32),
+        'b': torch.zeros(3, dtype=torch.float64)
+    })
+    assert t.nbytes() == 56
+
+
+def test_nbytes_should_count_shared_storage_once():
+    base = torch.zeros(10)
+    t = TensorStruct({
+        'a': base,
+        'b': {
+            'c': base[2:5]
+        }
+    })
+    assert t.nbytes() == 40
+    assert t.shared_storages() == [{('a',), ('b', 'c')}]
+    m = t.memory()
+    assert m[('b', 'c')].logical_nbytes == 12
+    assert m[('b', 'c')].storage_nbytes == 40
+    assert m[('a',)].shared and m[('b', 'c')].shared
+
+
+def test_memory_logical_size_should_ignore_strides():
+    t = TensorStruct({'a': torch.zeros(1).expand(1000)})
+    m = t.memory()
+    assert m[('a',)].logical_nbytes == 4000
+    assert m[('a',)].storage_nbytes == 4
+    assert t.nbytes() == 4
+
+
+def test_nbytes_should_count_meta_tensors_separately():
+    t = TensorStruct({
+        'a': torch.zeros(3, device='meta'),
+        'b': torch.zeros(5, device='meta')
+    })
+    assert t.nbytes() == 32
+    assert t.shared_storages() == []
+
+
+def test_shared_storages_should_be_empty_for_independent_tensors():
+    t = TensorStruct.zeros({'a': 2, 'b': 3})
+    assert t.shared_storages() == []
+
+
+def test_memory_should_support_sparse_tensors():
+    dense = torch.zeros((4, 4))
+    dense[1, 2] = 1.0
+    dense[3, 0] = 2.0
+    t = TensorStruct({
+        'a': dense.to_sparse(),
+        'b': torch.zeros(3)
+    })
+    m = t.memory()
+    # 2 x 2 int64 indices and 2 float32 values
+    assert m[('a',)].storage_nbytes == 2 * 2 * 8 + 2 * 4
+    assert not m[('a',)].shared
+    assert t.nbytes() == 40 + 12
+    assert t.shared_storages() == []
+
+
+def test_plan_should_match_allocated_struct():
+    shape = {
+        'a': 5,
+        'b': {
+            'c': (3, 4)
+        }
+    }
+    p = TensorStruct.plan(shape, prefix_shape=(10,), dtype=torch.float64)
+    t = TensorStruct.zeros(shape, prefix_shape=(10,), dtype=torch.float64)
+    assert p == t.memory()
+    assert sum(m.storage_nbytes for m in p.values()) == t.nbytes() == 10 * 17 * 8
+
+
+def test_plan_should_support_single_tensor():
+    p = TensorStruct.plan((2, 3), prefix_shape=(4,), dtype=torch.int32)
+    assert p == {(): TensorMemory((4, 2, 3), torch.int32, torch.device('cpu'), 96, 96, False)}
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason='CUDA is not available')
+def test_plan_should_match_allocated_struct_on_cuda():
+    shape = {'a': 5}
+    p = TensorStruct.plan(shape, prefix_shape=(10,), device='cuda')
+    t = TensorStruct.zeros(shape, prefix_shape=(10,), device='cuda')
+    assert p == t.memory()
@@ -0,0 +1,111 @@
+import os
+import pickle
+import zipfile
+
+import pytest
+import torch
+
+from torchstruct import TensorStruct, TensorHeader, parse_shape, read_header
+
+
+def test_parse_shape_should_prepend_prefix_shape():
+    assert parse_shape(5, (10,)) == (10, 5)
+    assert parse_shape((2, 3)) == (2, 3)
+
+
+def test_parse_shape_should_parse_nested_shapes():
+    s = parse_shape({
+        'a': 5,
+        'b': {
+            'c': (3, 4)
+        }
+    }, prefix_shape=(10,))
+    assert s == {'a': (10, 5), 'b': {'c': (10, 3, 4)}}
+
+
+def test_read_header_should_read_saved_struct(tmp_path):
+    t = TensorStruct({
+        'a': torch.zeros((4, 2), dtype=torch.float32),
+        'b': {
+            'c': torch.zeros(3, dtype=torch.int64)
+        }
+    })
+    path = str(tmp_path / 'struct.pt')
+    torch.save(t, path)
+    h = read_header(path)
+    assert h == {
+        'a': TensorHeader((4, 2), 'float32'),
+        'b': {
+            'c': TensorHeader((3,), 'int64')
+        }
+    }
+
+
+def test_read_header_should_read_built_struct(tmp_path):
+    t = TensorStruct.zeros({
+        'a': 2,
+        'b': {
+            'c': (3, 4)
+        }
+    }, prefix_shape=(10,))
+    path = str(tmp_path / 'struct.pt')
+    torch.save(t, path)
+    assert read_header(path) == {
+        'a': TensorHeader((10, 2), 'float32'),
+        'b': {
+            'c': TensorHeader((10, 3, 4), 'float32')
+        }
+    }
+
+
+def test_read_header_should_read_indexed_struct(tmp_path):
+    t = TensorStruct.ones({'a': 2, 'b': {'c': 3}}, prefix_shape=(10,), dtype=torch.float64)[2:5]
+    path = str(tmp_path / 'struct.pt')
+    torch.save(t, path)
+    assert read_header(path) == {
+        'a': TensorHeader((3, 2), 'float64'),
+        'b': {
+            'c': TensorHeader((3, 3), 'float64')
+        }
+    }
+
+
+def test_read_header_should_read_saved_tensor(tmp_path):
+    path = str(tmp_path / 'tensor.pt')
+    torch.save(torch.ones((2, 5), dtype=torch.float64), path)
+    assert read_header(path) == TensorHeader((2, 5), 'float64')
+
+
+@pytest.mark.parametrize('dtype', ['uint16', 'uint32', 'float8_e4m3fn', 'float8_e5m2', 'complex32'])
+def test_read_header_should_read_dtypes_saved_with_untyped_storage(tmp_path, dtype):
+    if not hasattr(torch, dtype):
+        pytest.skip(f'`torch.{dtype}` is not supported by installed PyTorch')
+    path = str(tmp_path / 'struct.pt')
+    torch.save(TensorStruct({'a': torch.zeros(2, dtype=getattr(torch, dtype))}), path)
+    assert read_header(path) == {'a': TensorHeader((2,), dtype)}
+
+
+class _Malicious:
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return os.system, (f'touch {self.path}',)
+
+
+def test_read_header_should_reject_disallowed_globals(tmp_path):
+    marker = tmp_path / 'executed'
+    path = str(tmp_path / 'malicious.pt')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('archive/data.pkl', pickle.dumps(_Malicious(marker)))
+    with pytest.raises(pickle.UnpicklingError):
+        _ = read_header(path)
+    assert not marker.exists()
+
+
+def test_read_header_should_raise_if_archive_has_no_data(tmp_path):
+    path = str(tmp_path / 'empty.pt')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('archive/version', '3')
+    with pytest.raises(ValueError):
+        _ = read_header(path)
@@ -0,0 +1,24 @@
+"""
+`torch` is imported lazily, on first access to one of tensor-related attributes, so schema utilities can be used
+without paying its import cost.
+"""
+import importlib
+
+from torchstruct.schema import TensorHeader, keys, leaf_items, parse_shape, rdefaultdict, read_header
+
+_LAZY_ATTRIBUTES = {'TensorStruct', 'TensorMemory', 'cat', 'stack', 'tensor_values'}
+
+__all__ = ['TensorHeader', 'keys', 'leaf_items', 'parse_shape', 'rdefaultdict', 'read_header',
+           *sorted(_LAZY_ATTRIBUTES)]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module('torchstruct.struct'), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module `{__name__}` has no attribute `{name}`')
+
+
+def __dir__():
+    return __all__
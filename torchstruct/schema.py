@@ -0,0 +1,201 @@
+"""
+Schema and metadata utilities which do not require `torch`.
+"""
+import codecs
+import pickle
+import zipfile
+from collections import defaultdict, OrderedDict
+from typing import Union, Dict, Tuple, Any, List, Set, Optional, NamedTuple, BinaryIO
+
+TShape = Tuple[int, ...]
+TComplexShape = Union[int, Tuple[int, ...], Dict[str, 'TComplexShape']]
+TPath = Tuple[str, ...]
+
+_STORAGE_DTYPES = {
+    'FloatStorage': 'float32',
+    'DoubleStorage': 'float64',
+    'HalfStorage': 'float16',
+    'BFloat16Storage': 'bfloat16',
+    'ComplexFloatStorage': 'complex64',
+    'ComplexDoubleStorage': 'complex128',
+    'LongStorage': 'int64',
+    'IntStorage': 'int32',
+    'ShortStorage': 'int16',
+    'CharStorage': 'int8',
+    'ByteStorage': 'uint8',
+    'BoolStorage': 'bool'
+}
+
+_DTYPES = {
+    'float32', 'float64', 'float16', 'bfloat16',
+    'float8_e4m3fn', 'float8_e4m3fnuz', 'float8_e5m2', 'float8_e5m2fnuz', 'float8_e8m0fnu',
+    'complex32', 'complex64', 'complex128',
+    'int8', 'int16', 'int32', 'int64',
+    'uint8', 'uint16', 'uint32', 'uint64',
+    'bool'
+}
+
+# Globals other than torch and torchstruct ones which `torch.save` emits
+_SAFE_GLOBALS = {
+    ('collections', 'OrderedDict'): OrderedDict,
+    ('collections', 'defaultdict'): defaultdict,
+    ('builtins', 'set'): set,
+    ('builtins', 'frozenset'): frozenset,
+    ('builtins', 'slice'): slice,
+    ('builtins', 'complex'): complex,
+    ('builtins', 'bytearray'): bytearray,
+    ('_codecs', 'encode'): codecs.encode
+}
+
+
+class TensorHeader(NamedTuple):
+    shape: TShape
+    dtype: str
+
+
+def rdefaultdict():
+    return defaultdict(rdefaultdict)
+
+
+def keys(d: Dict[str, Any], prefix: Optional[TPath] = None) -> Set[TPath]:
+    if prefix is None:
+        prefix = tuple()
+    k = []
+    for key, value in d.items():
+        if isinstance(value, dict):
+            k.extend(keys(value, prefix=prefix + (key,)))
+        k.append(prefix + (key,))
+    return set(k)
+
+
+def leaf_items(d: Dict[str, Any], prefix: Optional[TPath] = None) -> List[Tuple[TPath, Any]]:
+    if prefix is None:
+        prefix = tuple()
+    items = []
+    for key, value in d.items():
+        if isinstance(value, dict):
+            items.extend(leaf_items(value, prefix=prefix + (key,)))
+        else:
+            items.append((prefix + (key,), value))
+    return items
+
+
+def parse_shape(shape: TComplexShape, prefix_shape: TShape = ()) -> Union[TShape, Dict[str, Any]]:
+    """
+    Normalize `shape` into a tuple (or nested dict of tuples) of full shapes prepended with `prefix_shape`.
+    """
+    if isinstance(shape, dict):
+        return {key: parse_shape(value, prefix_shape) for key, value in shape.items()}
+    return (*prefix_shape, *_assure_iterable(shape))
+
+
+def read_header(f: Union[str, BinaryIO]) -> Union[TensorHeader, Dict[str, Any]]:
+    """
+    Read structure saved with `torch.save` without loading `torch` nor tensor data.
+    Each tensor is replaced with its `TensorHeader`, `TensorStruct` is replaced with its internal data.
+    Only globals which `torch.save` emits for tensors are allowed, `pickle.UnpicklingError` is raised otherwise.
+    """
+    if isinstance(f, str):
+        with open(f, 'rb') as file:
+            return read_header(file)
+    if zipfile.is_zipfile(f):
+        f.seek(0)
+        with zipfile.ZipFile(f) as archive:
+            name = next((n for n in archive.namelist() if n.endswith('data.pkl')), None)
+            if name is None:
+                raise ValueError('Archive does not contain `data.pkl`, it was not saved with `torch.save`')
+            with archive.open(name) as data:
+                result = _HeaderUnpickler(data).load()
+    else:
+        f.seek(0)
+        # Legacy format stores magic number, protocol version and system info before the data
+        for _ in range(3):
+            _HeaderUnpickler(f).load()
+        result = _HeaderUnpickler(f).load()
+    return _unwrap(result)
+
+
+def _assure_iterable(x):
+    if isinstance(x, tuple) or isinstance(x, list):
+        return x
+    return x,
+
+
+class _Stub:
+    pass
+
+
+class _StructStub:
+    def __setstate__(self, state):
+        self.data = state['_data']
+
+
+class _StorageType(NamedTuple):
+    dtype: Optional[str]
+
+
+def _rebuild_tensor(storage, storage_offset, size, *args, **kwargs):
+    return TensorHeader(tuple(size), storage.dtype)
+
+
+def _rebuild_tensor_v3(storage, storage_offset, size, stride, requires_grad, backward_hooks, dtype, *args):
+    return TensorHeader(tuple(size), dtype)
+
+
+def _rebuild_from_type(func, new_type, args, state):
+    return func(*args)
+
+
+def _rebuild_parameter(data, *args, **kwargs):
+    return data
+
+
+_REBUILD_FUNCTIONS = {
+    '_rebuild_tensor': _rebuild_tensor,
+    '_rebuild_tensor_v2': _rebuild_tensor,
+    '_rebuild_tensor_v3': _rebuild_tensor_v3,
+    '_rebuild_from_type_v2': _rebuild_from_type,
+    '_rebuild_parameter': _rebuild_parameter,
+    '_rebuild_parameter_with_state': _rebuild_parameter
+}
+
+_TENSOR_TYPES = {('torch', 'Tensor'), ('torch._tensor', 'Tensor'), ('torch.nn.parameter', 'Parameter')}
+
+
+class _HeaderUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module == '__builtin__':
+            module = 'builtins'
+        if module in ('torchstruct', 'torchstruct.struct') and name == 'TensorStruct':
+            return _StructStub
+        if module in ('torchstruct', 'torchstruct.schema') and name == 'rdefaultdict':
+            return rdefaultdict
+        if module == 'torch._utils':
+            if name not in _REBUILD_FUNCTIONS:
+                raise pickle.UnpicklingError(f'Unsupported tensor rebuild function (`{name}` given)')
+            return _REBUILD_FUNCTIONS[name]
+        if module == 'torch' and name in _STORAGE_DTYPES:
+            return _StorageType(_STORAGE_DTYPES[name])
+        if module in ('torch', 'torch.storage') and name == 'UntypedStorage':
+            return _StorageType(None)
+        if module == 'torch' and name in _DTYPES:
+            return name
+        if (module, name) in _TENSOR_TYPES:
+            return _Stub
+        if (module, name) in _SAFE_GLOBALS:
+            return _SAFE_GLOBALS[(module, name)]
+        raise pickle.UnpicklingError(f'Global is not allowed (`{module}.{name}` given)')
+
+    def persistent_load(self, pid):
+        # Both zip and legacy formats store `('storage', storage_type, key, location, ...)`
+        if not isinstance(pid, tuple) or len(pid) < 2 or pid[0] != 'storage' or not isinstance(pid[1], _StorageType):
+            raise pickle.UnpicklingError(f'Unsupported persistent id (`{pid}` given)')
+        return pid[1]
+
+
+def _unwrap(obj):
+    if isinstance(obj, _StructStub):
+        return _unwrap(obj.data)
+    if isinstance(obj, dict):
+        return {key: _unwrap(value) for key, value in obj.items()}
+    return obj
@@ -1,18 +1,28 @@
 from __future__ import annotations
 
 import operator
-from collections import defaultdict
 from functools import reduce
-from typing import Union, Dict, Tuple, Any, Callable, List, Set, Optional
+from typing import Union, Dict, Tuple, Any, Callable, List, Set, NamedTuple
 
 import torch
 
+from torchstruct.schema import TShape, TComplexShape, TPath, keys, leaf_items, parse_shape, rdefaultdict
+
 TData = Union[torch.Tensor, Dict[str, 'TData']]
-TShape = Tuple[int, ...]
-TComplexShape = Union[int, Tuple[int, ...], Dict[str, 'TComplexShape']]
 TDevice = Union[str, torch.device]
 
 
+class TensorMemory(NamedTuple):
+    shape: TShape
+    dtype: torch.dtype
+    device: torch.device
+    # Size of tensor data (`numel * element_size`), regardless of strides
+    logical_nbytes: int
+    # Size of underlying storage, which may be shared with other tensors
+    storage_nbytes: int
+    shared: bool
+
+
 class TensorStruct:
     def __init__(self, data: TData):
         if isinstance(data, dict):
@@ -21,6 +31,30 @@ class TensorStruct:
             assert isinstance(data, torch.Tensor)
         self._data = data
 
+    @staticmethod
+    def from_dict(data: TData, validate: bool = True) -> TensorStruct:
+        """
+        Wrap `data` into `TensorStruct`. With `validate=False` leaf types are not checked, which makes wrapping
+        data of already known structure (e.g. produced by other `TensorStruct` operations) cheap.
+        """
+        if validate:
+            return TensorStruct(data)
+        struct = TensorStruct.__new__(TensorStruct)
+        struct._data = data
+        return struct
+
+    @staticmethod
+    def from_batch(batch: List[Union[TData, TensorStruct]], dim: int = 0) -> TensorStruct:
+        """
+        Build batched structure from list of nested dicts (or structs) of the same structure by stacking each leaf
+        along new `dim`. Each element must have the same structure as the first one.
+        Leaves which are not tensors (e.g. Python scalars) are converted with `torch.as_tensor`.
+        """
+        if len(batch) == 0:
+            raise ValueError('At least one element is required')
+        batch = [b._data if isinstance(b, TensorStruct) else b for b in batch]
+        return TensorStruct.from_dict(_stack_dicts(batch, dim), validate=False)
+
     def data(self) -> TData:
         """
         Return internal data representation.
@@ -47,6 +81,47 @@ class TensorStruct:
         """
         return self.tensors()[0].size(dim)
 
+    # === Memory accounting ===
+    def memory(self) -> Dict[TPath, TensorMemory]:
+        """
+        Return memory footprint of each tensor in this structure, keyed by its path.
+        Single tensor structure is reported under empty path. Summing `storage_nbytes` of shared tensors counts
+        their storage multiple times, use `nbytes()` to get total size of this structure.
+        """
+        shared = set().union(*self.shared_storages())
+        return {path: _tensor_memory(t, path in shared) for path, t in self._leaves()}
+
+    def nbytes(self) -> int:
+        """
+        Return number of bytes held by this structure. Storages shared between tensors (e.g. views) are counted once.
+        """
+        return sum(storage_nbytes for storage_nbytes, _ in self._storages().values())
+
+    def shared_storages(self) -> List[Set[TPath]]:
+        """
+        Return groups of paths of tensors sharing the same underlying storage.
+        """
+        return [paths for _, paths in self._storages().values() if len(paths) > 1]
+
+    def _storages(self) -> Dict[Any, Tuple[int, Set[TPath]]]:
+        storages = {}
+        for path, t in self._leaves():
+            if t.layout != torch.strided:
+                # Sparse tensors do not expose single storage, so they are never considered shared
+                storages[path] = (_held_nbytes(t), {path})
+                continue
+            storage = _storage(t)
+            ptr = storage.data_ptr()
+            # Storages without data pointer (e.g. on `meta` device or empty ones) can not be told apart
+            key = (t.device, ptr) if ptr != 0 else path
+            storages.setdefault(key, (_storage_nbytes(storage), set()))[1].add(path)
+        return storages
+
+    def _leaves(self) -> List[Tuple[TPath, torch.Tensor]]:
+        if isinstance(self._data, dict):
+            return leaf_items(self._data)
+        return [((), self._data)]
+
     # === Representation ===
     def __repr__(self):
         return f'TensorStruct({self._data})'
@@ -58,11 +133,12 @@ class TensorStruct:
               prefix_shape: TShape,
               dtype: torch.dtype,
               device: TDevice) -> Union[TensorStruct, torch.Tensor]:
+        shape = parse_shape(shape, prefix_shape)
         if not isinstance(shape, dict):
-            return init_fn((*prefix_shape, *_assure_iterable(shape)), dtype=dtype, device=device)
+            return init_fn(shape, dtype=dtype, device=device)
         data = rdefaultdict()
-        _map_dict(data, shape, lambda s: init_fn((*prefix_shape, *_assure_iterable(s)), dtype=dtype, device=device))
-        return TensorStruct(data)
+        _map_dict(data, shape, lambda s: init_fn(s, dtype=dtype, device=device))
+        return TensorStruct.from_dict(data, validate=False)
 
     @staticmethod
     def zeros(shape: TComplexShape,
@@ -92,6 +168,27 @@ class TensorStruct:
               device: TDevice = 'cpu') -> Union[TensorStruct, torch.Tensor]:
         return TensorStruct.build(torch.randn, shape, prefix_shape, dtype, device)
 
+    @staticmethod
+    def plan(shape: TComplexShape,
+             prefix_shape: TShape = (),
+             dtype: torch.dtype = torch.float32,
+             device: TDevice = 'cpu') -> Dict[TPath, TensorMemory]:
+        """
+        Return memory footprint of each tensor that `zeros`, `ones`, `empty` or `randn` would allocate
+        for given arguments, without allocating them.
+        """
+        element_size = _element_size(dtype)
+        device = _resolve_device(device)
+
+        def leaf_memory(s):
+            nbytes = reduce(operator.mul, s, 1) * element_size
+            return TensorMemory(s, dtype, device, nbytes, nbytes, False)
+
+        shape = parse_shape(shape, prefix_shape)
+        if not isinstance(shape, dict):
+            return {(): leaf_memory(shape)}
+        return {path: leaf_memory(s) for path, s in leaf_items(shape)}
+
     # === Indexing ===
     def __contains__(self, item: str) -> bool:
         if not isinstance(self._data, dict):
@@ -183,12 +280,6 @@ class TensorStruct:
         self._data = state['_data']
 
 
-def _assure_iterable(x):
-    if isinstance(x, tuple) or isinstance(x, list):
-        return x
-    return x,
-
-
 def _map_dict(d_out: Dict[str, Any], d_in: Dict[str, Any], fn: Callable[[Any], Any]):
     for key, value in d_in.items():
         if isinstance(value, dict):
@@ -205,6 +296,17 @@ def _assert_dict(d: Dict[str, Any], fn: Callable[[Any], bool]):
             assert fn(value)
 
 
+def _stack_dicts(ds: List[TData], dim: int) -> TData:
+    first = ds[0]
+    if isinstance(first, dict):
+        if any(not isinstance(d, dict) or d.keys() != first.keys() for d in ds):
+            raise ValueError('All elements of batch must have the same structure')
+        return {key: _stack_dicts([d[key] for d in ds], dim) for key in first}
+    if any(isinstance(d, dict) for d in ds):
+        raise ValueError('All elements of batch must have the same structure')
+    return torch.stack([d if isinstance(d, torch.Tensor) else torch.as_tensor(d) for d in ds], dim=dim)
+
+
 def _update_dict_at(base: TData, data: TData, selector: Union[int, slice, torch.Tensor]):
     for key, value in base.items():
         if isinstance(value, dict):
@@ -213,21 +315,6 @@ def _update_dict_at(base: TData, data: TData, selector: Union[int, slice, torch.
             base[key][selector] = data[key]
 
 
-def rdefaultdict():
-    return defaultdict(rdefaultdict)
-
-
-def keys(d: Dict[str, Any], prefix: Optional[Tuple[str, ...]] = None) -> Set[Tuple[str, ...]]:
-    if prefix is None:
-        prefix = tuple()
-    k = []
-    for key, value in d.items():
-        if isinstance(value, dict):
-            k.extend(keys(value, prefix=prefix + (key,)))
-        k.append(prefix + (key,))
-    return set(k)
-
-
 def tensor_values(d: Dict[str, Any]) -> List[Any]:
     v = []
     for key, value in d.items():
@@ -238,6 +325,57 @@ def tensor_values(d: Dict[str, Any]) -> List[Any]:
     return v
 
 
+def _storage(t: torch.Tensor):
+    if hasattr(t, 'untyped_storage'):
+        return t.untyped_storage()
+    return t.storage()
+
+
+def _storage_nbytes(storage) -> int:
+    if hasattr(storage, 'nbytes'):
+        return storage.nbytes()
+    return storage.size() * storage.element_size()
+
+
+def _layout_components(t: torch.Tensor) -> List[torch.Tensor]:
+    if t.layout == torch.sparse_coo:
+        return [t._indices(), t._values()]
+    if t.layout in (getattr(torch, 'sparse_csr', None), getattr(torch, 'sparse_bsr', None)):
+        return [t.crow_indices(), t.col_indices(), t.values()]
+    if t.layout in (getattr(torch, 'sparse_csc', None), getattr(torch, 'sparse_bsc', None)):
+        return [t.ccol_indices(), t.row_indices(), t.values()]
+    return [t]
+
+
+def _held_nbytes(t: torch.Tensor) -> int:
+    if t.layout != torch.strided:
+        return sum(c.numel() * c.element_size() for c in _layout_components(t))
+    return _storage_nbytes(_storage(t))
+
+
+def _tensor_memory(t: torch.Tensor, shared: bool) -> TensorMemory:
+    return TensorMemory(tuple(t.shape), t.dtype, t.device, t.numel() * t.element_size(), _held_nbytes(t), shared)
+
+
+def _element_size(dtype: torch.dtype) -> int:
+    if hasattr(dtype, 'itemsize'):
+        return dtype.itemsize
+    # `torch.dtype.itemsize` is not available in older PyTorch versions
+    return torch.empty(0, dtype=dtype).element_size()
+
+
+def _resolve_device(device: TDevice) -> torch.device:
+    # Tensors created on e.g. `cuda` are placed on current device, so its index is resolved in the same way
+    device = torch.device(device)
+    if device.index is None:
+        module = getattr(torch, device.type, None)
+        # `torch.cpu.current_device()` returns device name instead of index
+        index = module.current_device() if hasattr(module, 'current_device') else None
+        if isinstance(index, int):
+            return torch.device(device.type, index)
+    return device
+
+
 def _dict_nested_get(d, keys):
     return reduce(operator.getitem, keys, d)
 